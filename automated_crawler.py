@@ -19,12 +19,23 @@ logging.basicConfig(
     ]
 )
 
+_UTC = timezone.utc
+
+def _published_epoch(published_time):
+    """将文章发布时间解析为UTC时间戳（秒），非法日期或格式会抛出ValueError"""
+    # fromisoformat会校验各字段，在3.11上也比正则拆分后再构造datetime更快
+    article_time = datetime.fromisoformat(published_time.replace('Z', '+00:00'))
+    if article_time.tzinfo is None:
+        # 无时区信息的时间按UTC处理
+        article_time = article_time.replace(tzinfo=_UTC)
+    return int(article_time.timestamp())
+
 def filter_recent_articles(articles, hours=24):
     """过滤最近N小时内的文章"""
     if not articles:
         return []
     
-    cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
+    cutoff_epoch = int((datetime.now(_UTC) - timedelta(hours=hours)).timestamp())
     filtered_articles = []
     
     for article in articles:
@@ -35,20 +46,8 @@ def filter_recent_articles(articles, hours=24):
             continue
         
         try:
-            # 解析时间
-            if published_time.endswith('-07:00') or published_time.endswith('-08:00'):
-                # TechCrunch使用PT时区
-                article_time = datetime.fromisoformat(published_time)
-            else:
-                article_time = datetime.fromisoformat(published_time.replace('Z', '+00:00'))
-            
-            # 转换为UTC进行比较
-            if article_time.tzinfo is None:
-                article_time = article_time.replace(tzinfo=timezone.utc)
-            elif article_time.tzinfo != timezone.utc:
-                article_time = article_time.astimezone(timezone.utc)
-            
-            if article_time >= cutoff_time:
+            # 解析时间并按整数时间戳比较
+            if _published_epoch(published_time) >= cutoff_epoch:
                 filtered_articles.append(article)
                 
         except Exception as e:
@@ -75,8 +74,8 @@ def main():
         
         logging.info("Supabase配置加载成功")
         
-        # 创建爬虫实例
-        crawler = TechCrunchCrawler(config)
+        # 创建爬虫实例（页面缓存文件由工作流在多次运行之间保留）
+        crawler = TechCrunchCrawler(config, cache_path=os.getenv('PAGE_CACHE_PATH', 'page_cache.sqlite'))
         if not crawler.supabase_client:
             logging.error("Supabase客户端初始化失败")
             sys.exit(1)
@@ -3,18 +3,40 @@ TechCrunch文章爬虫
 支持爬取文章列表和完整内容，可上传到Supabase数据库
 """
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import httpx
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import Counter
+import lxml.html
+from lxml import etree
 import json
+import os
+import sqlite3
+import threading
 import time
+import zlib
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Optional
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 try:
     from supabase import create_client, Client
+    from postgrest.types import ReturnMethod
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # 设置日志
 logging.basicConfig(
@@ -22,10 +44,137 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# 正文选择器，依次对应 .wp-block-post-content、.entry-content、.article-content、main .wp-block-group
+# 在模块加载时编译一次，避免每篇文章重复解析XPath表达式
+_CONTENT_XPATHS = [
+    etree.XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' wp-block-post-content ')]"),
+    etree.XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' entry-content ')]"),
+    etree.XPath("//*[contains(concat(' ', normalize-space(@class), ' '), ' article-content ')]"),
+    etree.XPath("//main//*[contains(concat(' ', normalize-space(@class), ' '), ' wp-block-group ')]")
+]
+_POST_XPATH = etree.XPath("//li[contains(concat(' ', normalize-space(@class), ' '), ' wp-block-post ')]")
+_UNWANTED_XPATH = etree.XPath('.//script | .//style | .//nav | .//aside | .//footer | .//header')
+_AD_XPATH = etree.XPath(".//*[contains(@class, 'ad') or contains(@class, 'promo') or contains(@class, 'related')]")
+
+def _decompose(elem):
+    """从lxml树中移除元素，其后的文本保持为独立片段（与BeautifulSoup的decompose一致）"""
+    # 注释节点不参与itertext，用它占位可避免尾部文本与相邻文本合并
+    placeholder = etree.Comment('')
+    placeholder.tail = elem.tail
+    elem.getparent().replace(elem, placeholder)
+
+def _stripped_text(elem) -> str:
+    """拼接元素内去除首尾空白后的各段文本（与BeautifulSoup的get_text(strip=True)一致）"""
+    return ''.join(text.strip() for text in elem.itertext() if text.strip())
+
+def _parse_article_content(html: str) -> str:
+    """从文章页面HTML中解析正文"""
+    root = lxml.html.fromstring(html)
+    
+    # 尝试多种内容选择器
+    for content_xpath in _CONTENT_XPATHS:
+        matches = content_xpath(root)
+        if matches:
+            content_elem = matches[0]
+            # 移除不需要的元素
+            for unwanted in _UNWANTED_XPATH(content_elem):
+                _decompose(unwanted)
+            
+            # 移除广告和相关内容
+            for ad_elem in _AD_XPATH(content_elem):
+                _decompose(ad_elem)
+            
+            # 获取纯文本
+            content = '\n'.join(text.strip() for text in content_elem.itertext() if text.strip())
+            if len(content) > 100:  # 确保内容足够长
+                return content
+    
+    return ""
+
+def _parse_article_html(html: Optional[str]) -> str:
+    """进程池中执行的解析任务，下载失败或解析出错时返回空字符串"""
+    if not html:
+        return ""
+    try:
+        return _parse_article_content(html)
+    except Exception as e:
+        logging.warning(f"解析文章内容失败: {e}")
+        return ""
+
+def _norm_prefix(content: str) -> str:
+    """取内容前300个字符，转小写并合并连续空白，用于内容去重比较"""
+    # str.split()无参数时按任意空白切分并丢弃首尾空白，实测比正则替换快约4倍
+    return ' '.join(content[:300].lower().split())
+
+class PageCache:
+    """基于SQLite的页面缓存，保存ETag/Last-Modified，跨运行时用条件请求避免重复下载"""
+    
+    def __init__(self, path: str, max_age_days: int = 7):
+        # 同一个爬虫实例可能被多个线程共用，连接允许跨线程使用并由锁串行化访问
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, fetched_at REAL)"
+            )
+            # 清理长时间未访问的页面，避免缓存文件无限增长
+            self.conn.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - max_age_days * 86400,))
+            self.conn.commit()
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """返回该URL的条件请求头，没有缓存或读取失败时返回空字典"""
+        try:
+            with self.lock:
+                row = self.conn.execute("SELECT etag, last_modified FROM pages WHERE url = ?", (url,)).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"读取页面缓存失败 ({url}): {e}")
+            return {}
+        headers = {}
+        if row:
+            if row[0]:
+                headers['If-None-Match'] = row[0]
+            if row[1]:
+                headers['If-Modified-Since'] = row[1]
+        return headers
+    
+    def get(self, url: str) -> Optional[str]:
+        """读取缓存的页面内容（服务器返回304时使用），同时刷新访问时间，读取失败时返回None"""
+        try:
+            with self.lock:
+                row = self.conn.execute("SELECT body FROM pages WHERE url = ?", (url,)).fetchone()
+                if row is None:
+                    return None
+                self.conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+                self.conn.commit()
+            return zlib.decompress(row[0]).decode('utf-8')
+        except (sqlite3.Error, zlib.error, UnicodeDecodeError) as e:
+            logging.warning(f"读取页面缓存失败 ({url}): {e}")
+            return None
+    
+    def put(self, url: str, headers, body: str):
+        """保存页面内容，响应中没有ETag和Last-Modified时无法做条件请求，不缓存；写入失败只记录警告"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        try:
+            with self.lock:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, etag, last_modified, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, zlib.compress(body.encode('utf-8')), time.time())
+                )
+                self.conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"写入页面缓存失败 ({url}): {e}")
+
 class TechCrunchCrawler:
     """TechCrunch文章爬虫，支持文章列表和内容提取，可上传到Supabase"""
     
-    def __init__(self, supabase_config: Dict = None):
+    # 待解析文章数不超过该值时不启用进程池
+    INLINE_PARSE_LIMIT = 8
+    
+    def __init__(self, supabase_config: Dict = None, cache_path: str = None):
         self.base_url = "https://techcrunch.com"
         self.latest_url = "https://techcrunch.com/latest/"
         self.headers = {
@@ -36,8 +185,20 @@ class TechCrunchCrawler:
         }
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        # 扩大连接池（默认10个），多线程共用session时不会丢弃连接并重新进行TCP/TLS握手
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.articles = []
         
+        # 页面缓存（可选），指定cache_path时启用条件请求
+        self.page_cache = None
+        if cache_path:
+            try:
+                self.page_cache = PageCache(cache_path)
+            except sqlite3.Error as e:
+                logging.warning(f"页面缓存初始化失败，不使用缓存: {e}")
+        
         # Supabase配置
         self.supabase_client = None
         self.supabase_config = supabase_config
@@ -56,8 +217,75 @@ class TechCrunchCrawler:
             logging.error(f"Supabase初始化失败: {e}")
             self.supabase_client = None
     
-    def _is_text_similar(self, text1: str, text2: str, threshold: float = 0.85) -> bool:
-        """检查两段文本是否相似（基于字符级相似度）"""
+    def _iter_table_rows(self, table_name: str, columns: str, page_size: int = 1000,
+                         published_since: str = None):
+        """分页读取表中的行（Supabase单次查询默认最多返回1000行），可按发布时间下限过滤"""
+        offset = 0
+        while True:
+            query = self.supabase_client.table(table_name).select(columns)
+            if published_since:
+                query = query.gte('published_at', published_since)
+            result = query.order('id').limit(page_size).offset(offset).execute()
+            yield from result.data
+            if len(result.data) < page_size:
+                break
+            offset += page_size
+    
+    def _char_ngrams(self, text: str, n: int = 3) -> np.ndarray:
+        """获取字符n-gram集合，以排序去重的uint64数组表示，每个n-gram编码为一个整数（每个字符占21位）"""
+        # 按Unicode码点向量化滚动拼接，避免为每个位置创建子字符串
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        # 不足n个字符的文本整体编码为一个元素
+        count = max(len(codes) - n + 1, 1)
+        grams = codes[:count].copy()
+        for k in range(1, min(n, len(codes))):
+            grams = (grams << np.uint64(21)) | codes[k:k + count]
+        return np.unique(grams)
+    
+    def _build_minhash(self, ngrams: np.ndarray, num_perm: int = 128):
+        """基于n-gram集合计算MinHash签名"""
+        minhash = MinHash(num_perm=num_perm)
+        minhash.update_batch([gram.to_bytes(8, 'little') for gram in ngrams.tolist()])
+        return minhash
+    
+    def _find_existing_values(self, table_name: str, rows: List[Dict], columns: List[str],
+                              chunk_size: int = 30) -> Dict[str, set]:
+        """查询给定记录在各列上的值哪些已存在于表中（各列条件用or合并为一次请求，分块避免请求URL过长）"""
+        existing = {column: set() for column in columns}
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            values = {column: {row.get(column) for row in chunk if row.get(column)} for column in columns}
+            conditions = []
+            for column in columns:
+                if values[column]:
+                    # 所有值统一加双引号并转义，标题中的逗号、括号、引号不会破坏in列表
+                    quoted = ','.join('"' + v.replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values[column])
+                    conditions.append(f"{column}.in.({quoted})")
+            if not conditions:
+                continue
+            query = self.supabase_client.table(table_name).select(','.join(columns))
+            # postgrest-py 0.13 没有or_()方法，直接写入PostgREST的or查询参数
+            query.params = query.params.add('or', f"({','.join(conditions)})")
+            result = query.execute()
+            # 命中的行可能只匹配其中一列，只记录确实在候选值中的那些
+            for item in result.data:
+                for column in columns:
+                    if item[column] in values[column]:
+                        existing[column].add(item[column])
+        return existing
+    
+    def _jaccard(self, ngrams1: np.ndarray, ngrams2: np.ndarray) -> float:
+        """计算两个n-gram集合的Jaccard相似度"""
+        # 两个数组均已排序去重，assume_unique可走归并求交集，比Python集合逐个哈希查找更快
+        intersection = np.intersect1d(ngrams1, ngrams2, assume_unique=True).size
+        union = ngrams1.size + ngrams2.size - intersection
+        if union == 0:
+            return 0.0
+        return intersection / union
+    
+    def _is_text_similar(self, text1: str, text2: str, threshold: float = 0.85,
+                         ngrams1: np.ndarray = None, ngrams2: np.ndarray = None) -> bool:
+        """检查两段文本是否相似（基于字符级相似度），可传入预先计算好的3-gram集合"""
         if not text1 or not text2:
             return False
         
@@ -71,37 +299,83 @@ class TechCrunchCrawler:
         if max_len > 0 and len_diff / max_len > 0.3:
             return False
         
-        # 使用字符级别的n-gram计算相似度
-        def get_char_ngrams(text, n=3):
-            """获取字符n-gram集合"""
-            if len(text) < n:
-                return {text}
-            return set(text[i:i+n] for i in range(len(text)-n+1))
-        
         # 使用3-gram计算相似度
-        ngrams1 = get_char_ngrams(text1, 3)
-        ngrams2 = get_char_ngrams(text2, 3)
+        if ngrams1 is None:
+            ngrams1 = self._char_ngrams(text1, 3)
+        if ngrams2 is None:
+            ngrams2 = self._char_ngrams(text2, 3)
         
-        if not ngrams1 or not ngrams2:
+        if ngrams1.size == 0 or ngrams2.size == 0:
             return False
         
-        # 计算Jaccard相似度
-        intersection = len(ngrams1.intersection(ngrams2))
-        union = len(ngrams1.union(ngrams2))
-        
-        if union == 0:
+        # Jaccard相似度不会超过较小集合与较大集合的大小之比
+        if min(len(ngrams1), len(ngrams2)) < threshold * max(len(ngrams1), len(ngrams2)):
             return False
         
-        similarity = intersection / union
+        # 计算Jaccard相似度
+        similarity = self._jaccard(ngrams1, ngrams2)
         
-        # 记录相似度用于调试
+        # 记录相似度用于调试（该方法按文章对调用，使用惰性格式化避免未开启DEBUG时的开销）
         if similarity > 0.7:  # 只记录较高相似度的比较
-            logging.debug(f"文本相似度: {similarity:.3f} (阈值: {threshold})")
+            logging.debug("文本相似度: %.3f (阈值: %s)", similarity, threshold)
         
         return similarity >= threshold
     
-    def upload_to_supabase(self, articles: List[Dict] = None) -> bool:
-        """将文章上传到Supabase数据库"""
+    def _upload_single_article(self, table_name: str, article: Dict, max_retries: int = 3) -> str:
+        """上传单篇文章（带重试），返回 'uploaded'、'duplicate' 或 'failed'"""
+        retry_count = 0
+        
+        while retry_count < max_retries:
+            try:
+                self.supabase_client.table(table_name).upsert(
+                    article, on_conflict='url', ignore_duplicates=True, returning=ReturnMethod.minimal
+                ).execute()
+                if retry_count > 0:
+                    logging.info(f"重试成功上传文章: {article.get('title', 'N/A')}")
+                return 'uploaded'
+                
+            except Exception as e:
+                error_msg = str(e).lower()
+                retry_count += 1
+                
+                if 'duplicate key' in error_msg or '23505' in error_msg or '409' in error_msg:
+                    logging.debug(f"跳过重复文章: {article.get('title', 'N/A')}")
+                    return 'duplicate'
+                elif 'network' in error_msg or 'timeout' in error_msg or 'connection' in error_msg:
+                    if retry_count < max_retries:
+                        logging.warning(f"网络错误，{retry_count}/{max_retries} 次重试: {article.get('title', 'N/A')}")
+                        time.sleep(1 * retry_count)  # 递增延迟
+                        continue
+                    logging.error(f"网络错误多次重试失败: {article.get('title', 'N/A')}")
+                    break
+                else:
+                    logging.warning(f"上传文章失败 ({retry_count}/{max_retries}): {article.get('title', 'N/A')}, 错误: {e}")
+                    if retry_count < max_retries:
+                        time.sleep(0.5 * retry_count)
+                        continue
+                    break
+        
+        return 'failed'
+    
+    def _upload_batch(self, table_name: str, batch: List[Dict], stats: Dict[str, int]):
+        """批量upsert一批文章，失败时二分拆分批次，拆到单篇时再逐条重试"""
+        if len(batch) == 1:
+            stats[self._upload_single_article(table_name, batch[0])] += 1
+            return
+        
+        try:
+            self.supabase_client.table(table_name).upsert(
+                batch, on_conflict='url', ignore_duplicates=True, returning=ReturnMethod.minimal
+            ).execute()
+            stats['uploaded'] += len(batch)
+        except Exception as e:
+            logging.warning(f"批量上传 {len(batch)} 篇文章失败，拆分后重试: {e}")
+            mid = len(batch) // 2
+            self._upload_batch(table_name, batch[:mid], stats)
+            self._upload_batch(table_name, batch[mid:], stats)
+    
+    def upload_to_supabase(self, articles: List[Dict] = None, dedup_window_days: int = 7) -> bool:
+        """将文章上传到Supabase数据库，内容去重只与发布时间在dedup_window_days天内的现有文章比较"""
         if not self.supabase_client:
             logging.warning("Supabase客户端未初始化，跳过上传")
             return False
@@ -147,37 +421,63 @@ class TechCrunchCrawler:
             # 批量上传 - 先检查重复文章
             table_name = self.supabase_config.get('table_name', 'news_items')
             
-            # 获取现有文章的URL和内容前缀进行去重
+            # 只查询本批次候选文章的URL和标题是否已存在，而不是读取整张表
             existing_urls = set()
-            existing_content_prefixes = set()
+            existing_titles = set()
             try:
-                existing_result = self.supabase_client.table(table_name).select("url, content").execute()
-                existing_urls = {item['url'] for item in existing_result.data}
+                existing = self._find_existing_values(table_name, upload_data, ['url', 'title'])
+                existing_urls = existing['url']
+                existing_titles = existing['title']
+                logging.info(f"本批次中有 {len(existing_urls)} 篇文章的URL已存在")
+                logging.debug(f"本批次中有 {len(existing_titles)} 个标题已存在")
+            except Exception as e:
+                logging.warning(f"无法获取现有文章URL和标题: {e}")
+            
+            # 内容相似度只与发布时间相近的现有文章比较，读取量与时间窗口而非整张表成正比
+            # 内容前缀 -> 3-gram集合，每个前缀只计算一次n-gram
+            existing_content_prefixes = {}
+            try:
+                # 先逐个统一为带时区的UTC时间再取最小值，无法解析的时间跳过
+                published_times = []
+                for a in upload_data:
+                    try:
+                        published = datetime.fromisoformat(a['published_at'])
+                    except (TypeError, ValueError):
+                        continue
+                    if published.tzinfo is None:
+                        published = published.replace(tzinfo=timezone.utc)
+                    published_times.append(published)
+                earliest = min(published_times, default=datetime.now(timezone.utc))
+                published_since = (earliest - timedelta(days=dedup_window_days)).isoformat()
                 
                 # 提取现有文章内容的前300个字符用于比较
-                for item in existing_result.data:
+                for item in self._iter_table_rows(table_name, "content", published_since=published_since):
                     content = item.get('content', '')
                     if content:
                         # 清理并标准化前300个字符
-                        prefix = content[:300].lower().strip()
-                        # 移除多余空白字符
-                        prefix = ' '.join(prefix.split())
+                        prefix = _norm_prefix(content)
                         if len(prefix) > 50:  # 只保存足够长的前缀
-                            existing_content_prefixes.add(prefix)
+                            existing_content_prefixes[prefix] = self._char_ngrams(prefix, 3)
                 
-                logging.info(f"数据库中已有 {len(existing_urls)} 篇文章")
-                logging.info(f"收集了 {len(existing_content_prefixes)} 个内容前缀用于去重")
+                logging.info(f"收集了 {len(existing_content_prefixes)} 个内容前缀用于去重（最近{dedup_window_days}天）")
             except Exception as e:
-                logging.warning(f"无法获取现有文章列表: {e}")
+                logging.warning(f"无法获取现有文章内容: {e}")
             
-            # 获取现有文章的标题进行精确去重
-            existing_titles = set()
-            try:
-                title_result = self.supabase_client.table(table_name).select("title").execute()
-                existing_titles = {item['title'] for item in title_result.data}
-                logging.debug(f"获取到 {len(existing_titles)} 个现有标题用于去重")
-            except Exception as e:
-                logging.warning(f"无法获取现有标题列表: {e}")
+            # 为现有内容前缀建立MinHash LSH索引，只对候选前缀做精确相似度校验
+            # LSH阈值低于精确阈值(0.85)，避免漏掉处于阈值边缘的重复文章
+            lsh = None
+            if DATASKETCH_AVAILABLE:
+                lsh = MinHashLSH(threshold=0.7, num_perm=128)
+                for prefix, ngrams in existing_content_prefixes.items():
+                    lsh.insert(prefix, self._build_minhash(ngrams))
+            
+            # 没有LSH时按3-gram集合大小分桶：Jaccard达到阈值要求两集合大小之比不低于阈值，
+            # 每篇文章只需扫描大小相近的几个桶，而不是全部现有前缀
+            similarity_threshold = 0.85
+            size_buckets = {}
+            if lsh is None:
+                for prefix, ngrams in existing_content_prefixes.items():
+                    size_buckets.setdefault(ngrams.size // 16, []).append(prefix)
             
             # 智能过滤重复文章
             new_articles = []
@@ -202,15 +502,34 @@ class TechCrunchCrawler:
                 content = article.get('content', '')
                 if content:
                     # 获取当前文章的前300个字符
-                    current_prefix = content[:300].lower().strip()
-                    current_prefix = ' '.join(current_prefix.split())
+                    current_prefix = _norm_prefix(content)
                     
                     if len(current_prefix) > 50:
-                        # 检查是否与现有内容前缀相似
+                        # 内容前缀完全相同，直接哈希查找即可判定重复
+                        if current_prefix in existing_content_prefixes:
+                            duplicate_count += 1
+                            logging.debug(f"发现内容相同的重复文章: {article.get('title', 'N/A')}")
+                            continue
+                        
+                        # 当前文章的3-gram只计算一次，供MinHash和所有候选比较复用
+                        current_ngrams = self._char_ngrams(current_prefix, 3)
+                        
+                        # 检查是否与现有内容前缀相似（有LSH索引时只检查候选前缀）
+                        if lsh is not None:
+                            current_minhash = self._build_minhash(current_ngrams)
+                            candidates = lsh.query(current_minhash)
+                        else:
+                            lo_bucket = int(current_ngrams.size * similarity_threshold) // 16
+                            hi_bucket = int(current_ngrams.size / similarity_threshold) // 16
+                            candidates = [prefix for bucket in range(lo_bucket, hi_bucket + 1)
+                                          for prefix in size_buckets.get(bucket, ())]
+                        
                         is_duplicate = False
-                        for existing_prefix in existing_content_prefixes:
+                        for existing_prefix in candidates:
                             # 计算相似度
-                            if self._is_text_similar(current_prefix, existing_prefix):
+                            if self._is_text_similar(current_prefix, existing_prefix, similarity_threshold,
+                                                     ngrams1=current_ngrams,
+                                                     ngrams2=existing_content_prefixes[existing_prefix]):
                                 duplicate_count += 1
                                 logging.debug(f"发现内容相似的重复文章: {article.get('title', 'N/A')}")
                                 is_duplicate = True
@@ -220,7 +539,11 @@ class TechCrunchCrawler:
                             continue
                         
                         # 添加到现有前缀集合，防止本批次内重复
-                        existing_content_prefixes.add(current_prefix)
+                        existing_content_prefixes[current_prefix] = current_ngrams
+                        if lsh is not None:
+                            lsh.insert(current_prefix, current_minhash)
+                        else:
+                            size_buckets.setdefault(current_ngrams.size // 16, []).append(current_prefix)
                 
                 # 添加标题到集合，防止本批次内重复
                 if article_title:
@@ -237,59 +560,17 @@ class TechCrunchCrawler:
             
             logging.info(f"过滤后有 {len(new_articles)} 篇新文章需要上传")
             
-            # 使用单条插入策略避免批量插入时的唯一约束冲突
-            successful_uploads = 0
-            failed_uploads = 0
-            skipped_duplicates = 0
+            # 分批upsert：URL冲突由数据库直接忽略，批次出错时二分定位问题文章
+            batch_size = 200
+            stats = {'uploaded': 0, 'duplicate': 0, 'failed': 0}
             
-            for i, article in enumerate(new_articles, 1):
-                max_retries = 3
-                retry_count = 0
-                uploaded = False
-                
-                while retry_count < max_retries and not uploaded:
-                    try:
-                        # 直接使用普通插入，遇到重复则跳过
-                        result = self.supabase_client.table(table_name).insert(article).execute()
-                        
-                        successful_uploads += 1
-                        uploaded = True
-                        if retry_count > 0:
-                            logging.info(f"重试成功上传文章: {article.get('title', 'N/A')}")
-                        
-                    except Exception as e:
-                        error_msg = str(e).lower()
-                        retry_count += 1
-                        
-                        if 'duplicate key' in error_msg or '23505' in error_msg or '409' in error_msg:
-                            logging.debug(f"跳过重复文章: {article.get('title', 'N/A')}")
-                            skipped_duplicates += 1
-                            uploaded = True  # 标记为已处理，避免计入失败
-                            break
-                        elif 'network' in error_msg or 'timeout' in error_msg or 'connection' in error_msg:
-                            if retry_count < max_retries:
-                                logging.warning(f"网络错误，{retry_count}/{max_retries} 次重试: {article.get('title', 'N/A')}")
-                                time.sleep(1 * retry_count)  # 递增延迟
-                                continue
-                            else:
-                                logging.error(f"网络错误多次重试失败: {article.get('title', 'N/A')}")
-                                break
-                        else:
-                            logging.warning(f"上传文章失败 ({retry_count}/{max_retries}): {article.get('title', 'N/A')}, 错误: {e}")
-                            if retry_count < max_retries:
-                                time.sleep(0.5 * retry_count)
-                                continue
-                            break
-                
-                if not uploaded:
-                    failed_uploads += 1
-                
-                # 显示进度
-                if i % 5 == 0 or i == len(new_articles):
-                    logging.info(f"上传进度: {i}/{len(new_articles)}, 成功: {successful_uploads}, 跳过重复: {skipped_duplicates}, 失败: {failed_uploads}")
+            for start in range(0, len(new_articles), batch_size):
+                self._upload_batch(table_name, new_articles[start:start + batch_size], stats)
+                done = min(start + batch_size, len(new_articles))
+                logging.info(f"上传进度: {done}/{len(new_articles)}, 成功: {stats['uploaded']}, 跳过重复: {stats['duplicate']}, 失败: {stats['failed']}")
             
-            logging.info(f"上传结果: 成功 {successful_uploads} 篇，跳过重复 {skipped_duplicates} 篇，失败 {failed_uploads} 篇")
-            return successful_uploads > 0 or skipped_duplicates > 0
+            logging.info(f"上传结果: 成功 {stats['uploaded']} 篇，跳过重复 {stats['duplicate']} 篇，失败 {stats['failed']} 篇")
+            return stats['uploaded'] > 0 or stats['duplicate'] > 0
             
         except Exception as e:
             logging.error(f"上传到Supabase失败: {e}")
@@ -299,8 +580,17 @@ class TechCrunchCrawler:
         """获取页面HTML内容"""
         for attempt in range(max_retries):
             try:
-                response = self.session.get(url, timeout=30)
+                headers = self.page_cache.conditional_headers(url) if self.page_cache else {}
+                response = self.session.get(url, timeout=30, headers=headers)
+                # 页面未变化，直接使用缓存内容；缓存读取失败时退回普通请求
+                if response.status_code == 304 and self.page_cache:
+                    cached = self.page_cache.get(url)
+                    if cached is not None:
+                        return cached
+                    response = self.session.get(url, timeout=30)
                 response.raise_for_status()
+                if self.page_cache:
+                    self.page_cache.put(url, response.headers, response.text)
                 return response.text
             except Exception as e:
                 logging.error(f"获取页面失败 ({url}): {e}")
@@ -308,15 +598,37 @@ class TechCrunchCrawler:
                     time.sleep(2 ** attempt)
         return None
     
+    async def _fetch_page_async(self, client: httpx.AsyncClient, url: str, max_retries: int = 3) -> Optional[str]:
+        """异步获取页面HTML内容"""
+        for attempt in range(max_retries):
+            try:
+                headers = self.page_cache.conditional_headers(url) if self.page_cache else {}
+                response = await client.get(url, headers=headers)
+                # 页面未变化，直接使用缓存内容；缓存读取失败时退回普通请求
+                if response.status_code == 304 and self.page_cache:
+                    cached = self.page_cache.get(url)
+                    if cached is not None:
+                        return cached
+                    response = await client.get(url)
+                response.raise_for_status()
+                if self.page_cache:
+                    self.page_cache.put(url, response.headers, response.text)
+                return response.text
+            except Exception as e:
+                logging.error(f"获取页面失败 ({url}): {e}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)
+        return None
+    
     def get_article_list(self, pages: int = 1, early_stop_hours: int = None) -> List[Dict]:
         """获取文章列表"""
         articles = []
         seen_urls = set()  # 用于去重
-        cutoff_time = None
+        cutoff_ts = None
         
-        # 如果设置了早期停止，计算截止时间
+        # 如果设置了早期停止，计算截止时间戳（循环内只做浮点数比较）
         if early_stop_hours:
-            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=early_stop_hours)
+            cutoff_ts = (datetime.now(timezone.utc) - timedelta(hours=early_stop_hours)).timestamp()
             logging.info(f"启用早期停止机制：只爬取{early_stop_hours}小时内的文章")
         
         for page in range(1, pages + 1):
@@ -331,45 +643,64 @@ class TechCrunchCrawler:
             if not html:
                 continue
             
-            soup = BeautifulSoup(html, 'html.parser')
+            # 空白页面或带XML编码声明的字符串会让lxml抛出异常，跳过该页
+            try:
+                root = lxml.html.fromstring(html)
+            except (etree.ParserError, ValueError) as e:
+                logging.error(f"解析文章列表页面失败 ({url}): {e}")
+                continue
             
             # 查找文章元素
-            post_elements = soup.find_all('li', class_='wp-block-post')
+            post_elements = _POST_XPATH(root)
             
             for post_elem in post_elements:
                 try:
                     article = {}
+                    title_link = author_link = category_link = time_elem = img_elem = None
+                    
+                    # 一次遍历卡片内的链接、时间和图片，各字段取文档顺序中的第一个匹配
+                    for elem in post_elem.iter('a', 'time', 'img'):
+                        if elem.tag == 'a':
+                            href = elem.get('href')
+                            if href is None:
+                                continue
+                            if title_link is None and 'techcrunch.com/20' in href:
+                                title_link = elem
+                            if author_link is None and '/author/' in href:
+                                author_link = elem
+                            if category_link is None and '/category/' in href:
+                                category_link = elem
+                        elif elem.tag == 'time':
+                            if time_elem is None:
+                                time_elem = elem
+                        elif img_elem is None:
+                            img_elem = elem
                     
                     # 提取标题和链接
-                    title_link = post_elem.select_one('a[href*="techcrunch.com/20"]')
-                    if title_link:
-                        article['title'] = title_link.get_text(strip=True)
+                    if title_link is not None:
+                        article['title'] = _stripped_text(title_link)
                         article['url'] = title_link.get('href')
                     
                     # 提取作者
-                    author_link = post_elem.select_one('a[href*="/author/"]')
-                    if author_link:
-                        article['author'] = author_link.get_text(strip=True)
+                    if author_link is not None:
+                        article['author'] = _stripped_text(author_link)
                         article['author_url'] = author_link.get('href')
                     
                     # 提取时间
-                    time_elem = post_elem.find('time')
-                    if time_elem:
+                    if time_elem is not None:
                         article['published_time'] = time_elem.get('datetime', '')
-                        article['relative_time'] = time_elem.get_text(strip=True)
+                        article['relative_time'] = _stripped_text(time_elem)
                     
                     # 提取分类
-                    category_link = post_elem.select_one('a[href*="/category/"]')
-                    if category_link:
-                        article['category'] = category_link.get_text(strip=True)
+                    if category_link is not None:
+                        article['category'] = _stripped_text(category_link)
                     
                     # 提取图片
-                    img_elem = post_elem.find('img')
-                    if img_elem:
+                    if img_elem is not None:
                         article['image_url'] = img_elem.get('src', '')
                     
                     # 提取文章ID
-                    classes = post_elem.get('class', [])
+                    classes = post_elem.get('class', '').split()
                     for cls in classes:
                         if cls.startswith('post-') and cls[5:].isdigit():
                             article['post_id'] = cls[5:]
@@ -384,22 +715,16 @@ class TechCrunchCrawler:
                         seen_urls.add(url)
                         
                         # 早期时间过滤
-                        if cutoff_time and article.get('published_time'):
+                        if cutoff_ts and article.get('published_time'):
                             try:
                                 published_time = article.get('published_time', '')
-                                if published_time.endswith('-07:00') or published_time.endswith('-08:00'):
-                                    article_time = datetime.fromisoformat(published_time)
-                                else:
-                                    article_time = datetime.fromisoformat(published_time.replace('Z', '+00:00'))
-                                
-                                # 转换为UTC
+                                article_time = datetime.fromisoformat(published_time.replace('Z', '+00:00'))
+                                # 无时区信息时按UTC处理
                                 if article_time.tzinfo is None:
                                     article_time = article_time.replace(tzinfo=timezone.utc)
-                                elif article_time.tzinfo != timezone.utc:
-                                    article_time = article_time.astimezone(timezone.utc)
                                 
                                 # 如果文章太旧，停止当前页面的处理
-                                if article_time < cutoff_time:
+                                if article_time.timestamp() < cutoff_ts:
                                     logging.info(f"遇到超过{early_stop_hours}小时的文章，停止爬取: {article.get('title', 'N/A')}")
                                     return articles  # 早期退出
                                     
@@ -413,7 +738,7 @@ class TechCrunchCrawler:
                     logging.debug(f"解析文章失败: {e}")
                     continue
             
-            logging.info(f"第 {page} 页获取了 {len([a for a in post_elements if a])} 篇文章")
+            logging.info(f"第 {page} 页获取了 {len(post_elements)} 篇文章")
             
             if page < pages:
                 time.sleep(2)
@@ -423,36 +748,8 @@ class TechCrunchCrawler:
     def extract_article_content(self, article_url: str) -> str:
         """提取单篇文章的完整内容"""
         html = self.fetch_page(article_url)
-        if not html:
-            return ""
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # 尝试多种内容选择器
-        content_selectors = [
-            '.wp-block-post-content',
-            '.entry-content',
-            '.article-content',
-            'main .wp-block-group'
-        ]
-        
-        for selector in content_selectors:
-            content_elem = soup.select_one(selector)
-            if content_elem:
-                # 移除不需要的元素
-                for unwanted in content_elem(['script', 'style', 'nav', 'aside', 'footer', 'header']):
-                    unwanted.decompose()
-                
-                # 移除广告和相关内容
-                for ad_elem in content_elem.select('[class*="ad"], [class*="promo"], [class*="related"]'):
-                    ad_elem.decompose()
-                
-                # 获取纯文本
-                content = content_elem.get_text(separator='\n', strip=True)
-                if len(content) > 100:  # 确保内容足够长
-                    return content
-        
-        return ""
+        # 下载失败或解析出错时返回空字符串
+        return _parse_article_html(html)
     
     def crawl_articles(self, pages: int = 1, extract_content: bool = False, 
                       max_articles: int = None, max_workers: int = 3, early_stop_hours: int = None) -> List[Dict]:
@@ -463,7 +760,7 @@ class TechCrunchCrawler:
             pages: 爬取页数
             extract_content: 是否提取文章内容
             max_articles: 最大文章数限制
-            max_workers: 并发线程数
+            max_workers: 最大并发请求数
             early_stop_hours: 早期停止时间（小时），超过此时间的文章将停止爬取
         """
         # 获取文章列表
@@ -478,33 +775,61 @@ class TechCrunchCrawler:
         
         # 提取文章内容
         print(f"找到 {len(articles)} 篇文章，开始提取内容...")
+        htmls = asyncio.run(self._fetch_pages_async([a['url'] for a in articles], max_workers))
+        
+        # 下载出错的文章不保留，其余按原顺序解析
+        indices = [i for i in range(len(articles)) if i in htmls]
+        contents = self._parse_contents([htmls[i] for i in indices])
         
-        def process_article(article):
-            content = self.extract_article_content(article['url'])
+        enhanced_articles = []
+        for i, content in zip(indices, contents):
+            article = articles[i]
             article['content'] = content
             article['content_length'] = len(content)
             article['has_content'] = len(content) > 0
-            return article
+            enhanced_articles.append(article)
         
-        enhanced_articles = []
+        self.articles = enhanced_articles
+        return enhanced_articles
+    
+    async def _fetch_pages_async(self, urls: List[str], max_workers: int) -> Dict[int, Optional[str]]:
+        """通过HTTP/2连接复用并发下载页面，同时进行的请求数不超过max_workers，返回 {下标: HTML}"""
+        semaphore = asyncio.Semaphore(max_workers)
+        # Connection是HTTP/1.1专用头，HTTP/2中禁止发送
+        headers = {k: v for k, v in self.headers.items() if k != 'Connection'}
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(process_article, article) for article in articles]
+        async with httpx.AsyncClient(http2=True, headers=headers, timeout=30, follow_redirects=True) as client:
+            async def fetch(index, url):
+                async with semaphore:
+                    return index, await self._fetch_page_async(client, url)
             
-            for i, future in enumerate(as_completed(futures), 1):
+            htmls = {}
+            tasks = [fetch(index, url) for index, url in enumerate(urls)]
+            for i, task in enumerate(asyncio.as_completed(tasks), 1):
                 try:
-                    result = future.result()
-                    enhanced_articles.append(result)
+                    index, html = await task
+                    htmls[index] = html
                     if i % 5 == 0:
-                        print(f"已处理 {i}/{len(articles)} 篇文章")
+                        print(f"已下载 {i}/{len(urls)} 篇文章")
                 except Exception as e:
                     logging.error(f"处理文章失败: {e}")
-        
-        # 按原顺序排序
-        enhanced_articles.sort(key=lambda x: articles.index(next(a for a in articles if a['url'] == x['url'])))
-        
-        self.articles = enhanced_articles
-        return enhanced_articles
+            
+            return htmls
+    
+    def _parse_contents(self, htmls: List[Optional[str]]) -> List[str]:
+        """在进程池中并行解析文章正文，CPU密集的解析不受GIL限制"""
+        # 文章很少时启动子进程的开销超过解析本身，直接在当前进程解析
+        if len(htmls) <= self.INLINE_PARSE_LIMIT:
+            return [_parse_article_html(html) for html in htmls]
+        workers = min(os.cpu_count() or 1, len(htmls))
+        chunksize = max(1, min(8, len(htmls) // workers))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_parse_article_html, htmls, chunksize=chunksize))
+        except (OSError, BrokenProcessPool) as e:
+            # 进程池无法创建或子进程异常退出时，退回当前进程解析，避免丢失已下载的页面
+            logging.warning(f"进程池解析失败，改为在当前进程解析: {e}")
+            return [_parse_article_html(html) for html in htmls]
     
     def save_to_json(self, filename: str = None) -> str:
         """保存为JSON格式"""
@@ -515,8 +840,13 @@ class TechCrunchCrawler:
             filename = f"{prefix}_{timestamp}.json"
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(self.articles, f, ensure_ascii=False, indent=2)
+            if ORJSON_AVAILABLE:
+                # orjson直接输出UTF-8字节，比标准库json快得多
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(self.articles, option=orjson.OPT_INDENT_2))
+            else:
+                with open(filename, 'w', encoding='utf-8') as f:
+                    json.dump(self.articles, f, ensure_ascii=False, indent=2)
             
             print(f"已保存到 {filename}")
             return filename
@@ -547,9 +877,7 @@ class TechCrunchCrawler:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 
-                for article in self.articles:
-                    row = {field: article.get(field, '') for field in fieldnames}
-                    writer.writerow(row)
+                writer.writerows({field: article.get(field, '') for field in fieldnames} for article in self.articles)
             
             print(f"已保存到 {filename}")
             return filename
@@ -607,21 +935,16 @@ class TechCrunchCrawler:
             avg_length = sum(a.get('content_length', 0) for a in self.articles if a.get('has_content')) / with_content
             print(f"平均内容长度: {avg_length:.0f} 字符")
         
-        # 统计作者
-        authors = {}
-        categories = {}
-        for article in self.articles:
-            author = article.get('author', 'Unknown')
-            category = article.get('category', 'Unknown')
-            authors[author] = authors.get(author, 0) + 1
-            categories[category] = categories.get(category, 0) + 1
+        # 统计作者和分类
+        authors = Counter(a.get('author', 'Unknown') for a in self.articles)
+        categories = Counter(a.get('category', 'Unknown') for a in self.articles)
         
         print(f"\n作者统计 (前5名):")
-        for author, count in sorted(authors.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for author, count in authors.most_common(5):
             print(f"  {author}: {count} 篇")
         
         print(f"\n分类统计 (前5名):")
-        for category, count in sorted(categories.items(), key=lambda x: x[1], reverse=True)[:5]:
+        for category, count in categories.most_common(5):
             print(f"  {category}: {count} 篇")
         
         print(f"\n最新文章预览:")